@@ -14,7 +14,9 @@
  *   - Servos on PWM pins 2-13, 44-46 (15 pins on Mega)
  *
  * Serial Protocol (to/from Raspberry Pi):
- *   SEND:    "EMG:<ch0>,<ch1>,...,<ch15>\n"
+ *   SEND:    EMG frame, binary: 0xA5 + 8x uint16 little-endian (RMS x 100)
+ *            + CRC-8 (poly 0x07) of the 16 value bytes, so the host can resync
+ *   SEND:    "STATUS:<msg>\n" / "TEST:<msg>\n"
  *   RECEIVE: "SERVO:<s0>,<s1>,...,<s26>\n"  (angles 0-180)
  *   RECEIVE: "MODE:<0=collect|1=control|2=test>\n"
  */
@@ -28,6 +30,8 @@
 #define SERIAL_BAUD         115200
 #define EMG_SAMPLE_RATE_MS  5     // 200Hz sampling
 #define WINDOW_SIZE         50    // RMS window (50 samples = 250ms at 200Hz)
+#define EMG_FRAME_TAG       0xA5  // first byte of a binary EMG frame
+#define EMG_FRAME_LEN       (2 + 2 * NUM_EMG_CHANNELS)  // tag + values + CRC-8
 
 // EMG analog pins (A0-A7 on Mega)
 const int EMG_PINS[NUM_EMG_CHANNELS] = {A0, A1, A2, A3, A4, A5, A6, A7};
@@ -138,13 +142,31 @@ float computeRMS(int channel) {
 }
 
 // ─── SEND EMG DATA ─────────────────────────────────────────────────────────
+// CRC-8, polynomial 0x07, init 0 (must match comms/arduino_link.py)
+uint8_t crc8(const uint8_t* data, int len) {
+  uint8_t crc = 0;
+  for (int i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+// One fixed-size binary frame instead of ~60 chars of text: the host decodes
+// it with a single struct unpack instead of split + float() per channel. The
+// trailing CRC lets a host that joins mid-stream find the frame boundaries.
 void sendEMGData() {
-  Serial.print("EMG:");
+  uint8_t frame[EMG_FRAME_LEN];
+  frame[0] = EMG_FRAME_TAG;
   for (int ch = 0; ch < NUM_EMG_CHANNELS; ch++) {
-    Serial.print(computeRMS(ch), 2);
-    if (ch < NUM_EMG_CHANNELS - 1) Serial.print(",");
+    uint16_t v = (uint16_t)(computeRMS(ch) * 100.0 + 0.5);  // 0.01 resolution
+    frame[1 + 2 * ch] = v & 0xFF;
+    frame[2 + 2 * ch] = v >> 8;
   }
-  Serial.println();
+  frame[EMG_FRAME_LEN - 1] = crc8(frame + 1, 2 * NUM_EMG_CHANNELS);
+  Serial.write(frame, EMG_FRAME_LEN);
 }
 
 // ─── PARSE INCOMING COMMANDS ───────────────────────────────────────────────
@@ -6,19 +6,127 @@ Handles connection to Arduino either via:
   - TCP over WiFi via ESP32 bridge (wireless/final)
 
 Exposes a unified interface regardless of connection type.
+
+Wire protocol (Arduino -> host):
+  - EMG frames are binary: 1 tag byte (0xA5) + 8x uint16 little-endian,
+    each value being the channel RMS in hundredths, + a CRC-8 (poly 0x07)
+    of the 16 value bytes (18 bytes per frame). The CRC is what lets a host
+    that joins mid-stream (WiFi bridge, dropped serial byte) resync.
+  - Everything else (STATUS:/TEST:) is a newline-terminated text line.
+  - Text "EMG:<ch0>,...,<ch7>" lines are still accepted (older firmware).
+
+Wire protocol (host -> Arduino):
+  - Text commands (SERVO:/MODE:/RESET/PING), one per line.
+  - A device that announces "STATUS:PROTO:2" gets SERVO as a binary frame
+    instead: 1 tag byte (0xA6) + 15 uint8 angles (16 bytes per frame).
 """
 
+import os
+import re
+import sys
 import serial
 import socket
+import selectors
+import struct
 import threading
-import queue
 import time
 import logging
+import numpy as np
+from functools import lru_cache
 from typing import Optional, Callable
 
-logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+# Optional: compiles the EMG frame decoder (pip install numba)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 log = logging.getLogger("BioForge.Comms")
 
+NUM_EMG_CHANNELS = 8
+EMG_FRAME_TAG    = 0xA5             # never a valid first byte of a text line
+EMG_SCALE        = 0.01             # uint16 on the wire -> RMS value
+_EMG_STRUCT      = struct.Struct("<B8HB")   # tag, values, CRC-8
+_LINE_RE         = re.compile(r"^(EMG|STATUS|TEST):(.*)$")
+EMG_FRAME_SIZE   = _EMG_STRUCT.size
+_TAG_BYTE        = bytes((EMG_FRAME_TAG,))
+RX_BUF_SIZE      = 1 << 16          # 64 KiB receive buffer, reused for the whole session
+EMG_BATCH        = 256              # max frames decoded per compiled call
+SOCK_BUF_SIZE    = 1 << 20          # kernel SO_RCVBUF / SO_SNDBUF for TCP links
+READY_TIMEOUT_S  = 1.5              # max wait for STATUS:READY/PONG after connecting
+TX_TIMEOUT_S     = 1.0              # sendall may block this long on a full send buffer
+SO_BUSY_POLL     = getattr(socket, "SO_BUSY_POLL", 46)   # Linux; not exported by Python
+
+NUM_SERVOS      = 15
+SERVO_FLUSH_S   = 0.02             # coalesce servo frames for up to 20 ms (~50 Hz)
+_ANGLE_STR      = [str(a).encode() for a in range(181)]
+SERVO_FRAME_TAG = 0xA6             # binary SERVO frame, sent once the device reports PROTO:2
+
+
+def _crc8_table() -> np.ndarray:
+    table = np.empty(256, dtype=np.uint8)
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = ((c << 1) ^ 0x07) & 0xFF if c & 0x80 else (c << 1) & 0xFF
+        table[i] = c
+    return table
+
+
+_CRC8 = _crc8_table()
+
+
+def _emg_frame_ok(buf, off):
+    """True if the CRC-8 of the EMG frame at buf[off] matches its value bytes."""
+    crc = 0
+    for i in range(off + 1, off + EMG_FRAME_SIZE - 1):
+        crc = _CRC8[crc ^ buf[i]]
+    return crc == buf[off + EMG_FRAME_SIZE - 1]
+
+
+def _scan_emg_frames(buf, off, end, out):
+    """
+    Decode the run of back-to-back EMG frames starting at buf[off] into the
+    rows of out. Stops at the first text byte, a partial or corrupt frame, or
+    a full out. Returns (offset after the run, number of rows written).
+    """
+    n = 0
+    while (n < out.shape[0] and end - off >= EMG_FRAME_SIZE and buf[off] == EMG_FRAME_TAG
+           and _emg_frame_ok(buf, off)):
+        for ch in range(NUM_EMG_CHANNELS):
+            raw = buf[off + 1 + 2 * ch] | (buf[off + 2 + 2 * ch] << 8)
+            out[n, ch] = raw * EMG_SCALE
+        off += EMG_FRAME_SIZE
+        n += 1
+    return off, n
+
+
+if HAS_NUMBA:
+    # nogil: the Tk thread keeps running while a burst of frames is decoded
+    _emg_frame_ok = njit(cache=True, nogil=True)(_emg_frame_ok)
+    _scan_emg_frames = njit(cache=True, nogil=True)(_scan_emg_frames)
+
+
+def warmup_decoder():
+    """
+    Compile (or load from numba's cache) the EMG frame decoder now, so the
+    RX thread doesn't stall on it while the first burst of data arrives.
+    A no-op without numba.
+    """
+    if HAS_NUMBA:
+        frame = np.zeros(EMG_FRAME_SIZE, dtype=np.uint8)
+        frame[0] = EMG_FRAME_TAG
+        _scan_emg_frames(frame, 0, EMG_FRAME_SIZE, np.empty((1, NUM_EMG_CHANNELS), dtype=np.float32))
+
+
+@lru_cache(maxsize=64)
+def _encode_servo(angles: bytes, binary: bool = False) -> bytes:
+    """SERVO frame for 15 clamped angles (one byte each). Gesture poses repeat, so cache them."""
+    if binary:
+        return bytes((SERVO_FRAME_TAG,)) + angles
+    return b"SERVO:" + b",".join([_ANGLE_STR[a] for a in angles]) + b"\n"
+
 
 class ArduinoConnection:
     """
@@ -31,94 +139,208 @@ class ArduinoConnection:
                  port: str = "COM3",          # Windows: COM3, COM4 etc. Check Device Manager
                  baud: int = 115200,
                  wifi_host: str = "192.168.1.100",  # ESP32 IP address
-                 wifi_port: int = 5000):
+                 wifi_port: int = 5000,
+                 busy_poll_us: int = 50,      # Linux socket busy-poll; 0 to save CPU on a Pi
+                 rx_realtime: bool = False):  # pin + prioritise the RX thread (may need admin/root)
 
         self.mode = mode
         self.port = port
         self.baud = baud
         self.wifi_host = wifi_host
         self.wifi_port = wifi_port
+        self.busy_poll_us = busy_poll_us
+        self.rx_realtime = rx_realtime
 
         self._conn = None          # serial.Serial or socket
         self._running = False
+        self._ready = threading.Event()   # set on STATUS:READY / STATUS:PONG
         self._rx_thread = None
-        self._tx_queue = queue.Queue()
+        self._sel = None           # selector over conn + wakeup socket (None: blocking reads)
+        self._wake_r = self._wake_w = None
+        self._rx_buf = bytearray(RX_BUF_SIZE)
+        self._rx_head = 0          # first unparsed byte
+        self._rx_tail = 0          # end of received data
+        self._rx_np = np.frombuffer(self._rx_buf, dtype=np.uint8)   # same memory
+        self._emg_rows = np.empty((EMG_BATCH, NUM_EMG_CHANNELS), dtype=np.float32)
+        self._tx_lock = threading.Lock()
+        self._write = None         # conn.write (serial) or conn.sendall (socket)
+        self._read_fn = None       # _read_serial or _read_sock, bound in connect()
+        self._pending_servo: Optional[bytes] = None   # latest unsent SERVO frame
+        self._last_servo: Optional[bytes] = None
+        self._servo_due = threading.Event()   # wakes the flusher when a pose is queued
+        self._flush_thread = None
+        self._servo_binary = False  # device accepts binary SERVO frames (STATUS:PROTO:2)
 
         # Callbacks
         self.on_emg_data: Optional[Callable] = None    # called with list of floats
         self.on_status: Optional[Callable] = None       # called with string
 
-        # Latest EMG reading (thread-safe via lock)
-        self._emg_lock = threading.Lock()
-        self._latest_emg = [0.0] * 8
+        # Text line dispatch, keyed by the tag matched by _LINE_RE
+        self._line_handlers = {
+            "EMG": self._handle_emg_text,
+            "STATUS": self._handle_status,
+            "TEST": self._handle_test,
+        }
+
+        # Latest EMG reading, double-buffered without a lock: the RX thread
+        # (sole writer) fills the back buffer, then bumps _emg_seq, which
+        # makes it the front one (_emg_bufs[_emg_seq & 1]).
+        self._emg_bufs = (np.zeros(NUM_EMG_CHANNELS, dtype=np.float32),
+                          np.zeros(NUM_EMG_CHANNELS, dtype=np.float32))
+        self._emg_seq = 0
+
+        # Rate-limited warnings (a flaky link can produce thousands/s), per kind:
+        # kind -> [time of last log, messages suppressed since]
+        self._warn_state = {}
 
     # ── Connect / Disconnect ──────────────────────────────────────────────
 
     def connect(self) -> bool:
         try:
+            warmup_decoder()
             if self.mode == "usb" and self.port.upper() == "SIMULATOR":
                 # Connect to local hardware simulator (no Arduino needed)
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.connect(("127.0.0.1", 5001))
-                sock.settimeout(1.0)
-                self._conn = sock
+                self._conn = self._open_socket("127.0.0.1", 5001)
                 self.mode = "wifi"  # reuse socket path
                 log.info("Connected to LOCAL SIMULATOR on 127.0.0.1:5001")
             elif self.mode == "usb":
-                self._conn = serial.Serial(self.port, self.baud, timeout=1)
+                # On POSIX the port is select()-able, so reads never need to block
+                timeout = 0 if os.name == "posix" else 1
+                self._conn = serial.Serial(self.port, self.baud, timeout=timeout)
                 log.info(f"Connected via USB: {self.port} @ {self.baud} baud")
             elif self.mode == "wifi":
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.connect((self.wifi_host, self.wifi_port))
-                sock.settimeout(1.0)
-                self._conn = sock
+                self._conn = self._open_socket(self.wifi_host, self.wifi_port)
                 log.info(f"Connected via WiFi: {self.wifi_host}:{self.wifi_port}")
             else:
                 raise ValueError(f"Unknown mode: {self.mode}")
 
+            # Bind the per-mode TX/RX functions once instead of branching per call
+            if self.mode == "usb":
+                self._write, self._read_fn = self._conn.write, self._read_serial
+            else:
+                self._write, self._read_fn = self._conn.sendall, self._read_sock
+            self._open_selector()
+
+            self._ready.clear()
+            self._servo_binary = False
+            # Nothing queued or sent yet on this link: the first pose must go out
+            with self._tx_lock:
+                self._pending_servo = self._last_servo = None
+            self._servo_due.clear()
             self._running = True
             self._rx_thread = threading.Thread(target=self._receive_loop, daemon=True)
             self._rx_thread.start()
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
 
-            # Start TX thread
-            self._tx_thread = threading.Thread(target=self._transmit_loop, daemon=True)
-            self._tx_thread.start()
-
-            time.sleep(0.5)
+            # Return as soon as the board answers instead of sleeping blindly
             self.send("PING")
+            if not self._ready.wait(timeout=READY_TIMEOUT_S):
+                log.warning(f"No READY/PONG from Arduino after {READY_TIMEOUT_S}s, continuing")
             return True
 
         except Exception as e:
             log.error(f"Connection failed: {e}")
             return False
 
+    def _open_socket(self, host: str, port: int) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Buffer sizes must be set before connect() to affect the TCP window
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF_SIZE)
+        sock.connect((host, port))
+        # Servo/control frames are tiny: send them now, don't wait for Nagle
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if hasattr(socket, "TCP_QUICKACK"):  # Linux only
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        if self.busy_poll_us and sys.platform.startswith("linux"):
+            # Spin briefly in the kernel for new data before sleeping the RX thread
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, self.busy_poll_us)
+            except OSError as e:
+                log.debug(f"SO_BUSY_POLL not available: {e}")
+        # Not non-blocking: sendall must be able to wait out a full send buffer
+        # rather than stop mid-command. Reads only happen once the selector
+        # reports data, so recv_into still returns immediately.
+        sock.settimeout(TX_TIMEOUT_S)
+        return sock
+
+    def _open_selector(self):
+        """Wait on the link and a wakeup socketpair instead of timeout polling."""
+        if self.mode == "usb" and os.name != "posix":
+            return  # Windows COM ports can't be selected on; use the 1 s read timeout
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(self._conn, selectors.EVENT_READ)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._sel.register(self._wake_r, selectors.EVENT_READ)
+
     def disconnect(self):
         self._running = False
-        time.sleep(0.2)
-        if self._conn:
-            try:
-                self._conn.close()
-            except:
-                pass
+        self._servo_due.set()
+        if self._wake_w:
+            self._wake_w.send(b"\0")
+        for t in (self._rx_thread, self._flush_thread):
+            if t and t is not threading.current_thread():
+                t.join(timeout=1.5)
+        for obj in (self._conn, self._sel, self._wake_r, self._wake_w):
+            if obj:
+                try:
+                    obj.close()
+                except:
+                    pass
+        self._sel = self._wake_r = self._wake_w = None
         log.info("Disconnected")
 
     # ── Send ──────────────────────────────────────────────────────────────
 
     def send(self, message: str):
-        """Queue a message to send to Arduino."""
-        self._tx_queue.put(message + "\n")
+        """Send a message to Arduino (written directly from the caller's thread)."""
+        self._send_raw((message + "\n").encode("utf-8"))
 
     def send_servo_angles(self, angles: list):
         """
         Send 15 servo angles to Arduino.
         angles: list of ints 0-180, length 15
         """
-        angles = [int(max(0, min(180, a))) for a in angles]
+        arr = np.asarray(angles[:NUM_SERVOS], dtype=np.float32)
         # Pad to 15 if short
-        while len(angles) < 15:
-            angles.append(90)
-        msg = "SERVO:" + ",".join(str(a) for a in angles[:15])
-        self.send(msg)
+        key = np.full(NUM_SERVOS, 90, dtype=np.uint8)
+        key[:arr.size] = np.clip(arr, 0, 180)
+        raw = _encode_servo(key.tobytes(), self._servo_binary)
+
+        # Only the newest pose matters: overwrite any frame that hasn't gone
+        # out yet, and wake the flusher only for the first one queued.
+        with self._tx_lock:
+            schedule = self._pending_servo is None
+            self._pending_servo = raw
+        if schedule:
+            self._servo_due.set()
+
+    def flush(self):
+        """Write any pending servo frame now."""
+        self._send_raw(b"")
+
+    def _send_raw(self, raw: bytes):
+        """Write raw plus any pending servo frame in a single syscall."""
+        if not self._write:
+            return
+        try:
+            with self._tx_lock:
+                servo = self._pending_servo
+                self._pending_servo = None
+                out = raw
+                if servo is not None and servo != self._last_servo:
+                    out = servo + raw
+                    self._last_servo = servo
+                if raw:
+                    # Control messages may change servo state (RESET, MODE),
+                    # so the next pose must be sent even if it repeats.
+                    self._last_servo = None
+                if out:
+                    self._write(out)
+        except Exception as e:
+            if self._running:
+                log.error(f"TX error: {e}")
 
     def set_mode(self, mode: int):
         """0=collect, 1=control, 2=test"""
@@ -131,75 +353,226 @@ class ArduinoConnection:
 
     def get_emg(self) -> list:
         """Returns latest EMG RMS values (thread-safe)."""
-        with self._emg_lock:
-            return list(self._latest_emg)
+        while True:
+            seq = self._emg_seq
+            vals = self._emg_bufs[seq & 1].tolist()
+            if self._emg_seq == seq:     # no publish raced with the copy
+                return vals
 
     # ── Internal Threads ──────────────────────────────────────────────────
 
     def _receive_loop(self):
-        buffer = ""
+        if self.rx_realtime:
+            self._boost_rx_thread()
+        view = memoryview(self._rx_buf)
+        read, consume, compact = self._read_fn, self._consume, self._compact_rx
+        wait = self._wait_readable if self._sel else None
         while self._running:
             try:
-                if self.mode == "usb":
-                    data = self._conn.readline().decode("utf-8", errors="ignore")
-                else:
-                    chunk = self._conn.recv(256).decode("utf-8", errors="ignore")
-                    buffer += chunk
-                    while "\n" in buffer:
-                        line, buffer = buffer.split("\n", 1)
-                        data = line
-                        self._parse_line(data.strip())
+                if wait and not wait():
+                    break
+                n = read(view[self._rx_tail:])
+                if not n:
                     continue
-
-                self._parse_line(data.strip())
+                self._rx_tail += n
+                self._rx_head = consume(self._rx_head, self._rx_tail)
+                compact()
 
             except serial.SerialException as e:
                 log.error(f"Serial error: {e}")
                 break
-            except socket.timeout:
-                continue
             except Exception as e:
                 if self._running:
                     log.error(f"RX error: {e}")
                 break
 
-    def _parse_line(self, line: str):
-        if not line:
-            return
+    def _flush_loop(self):
+        """Single long-lived flusher: sends the newest queued pose SERVO_FLUSH_S after the first."""
+        while self._running:
+            self._servo_due.wait()
+            if not self._running:
+                break
+            time.sleep(SERVO_FLUSH_S)
+            self._servo_due.clear()     # before flush: a pose queued after it re-arms us
+            self.flush()
+
+    def _boost_rx_thread(self):
+        """Pin the calling (RX) thread to the last CPU and raise its priority.
+        Core 0 and the Tk thread are left alone. Each step is best effort and
+        never stops the RX thread from starting."""
+        try:
+            if hasattr(os, "sched_setaffinity"):            # Linux: per-thread when pid=0
+                cpus = sorted(os.sched_getaffinity(0))
+                if len(cpus) > 1:
+                    os.sched_setaffinity(0, {cpus[-1]})
+                    log.info(f"RX thread pinned to CPU {cpus[-1]}")
+            elif sys.platform == "win32":
+                import ctypes
+                cpus = os.cpu_count() or 1
+                if cpus > 1:
+                    kernel32 = ctypes.windll.kernel32
+                    kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << (cpus - 1))
+                    log.info(f"RX thread pinned to CPU {cpus - 1}")
+        except Exception as e:
+            log.warning(f"Could not pin RX thread: {e}")
 
-        if line.startswith("EMG:"):
+        try:
+            if hasattr(os, "sched_setaffinity"):
+                os.nice(-5)                                 # needs CAP_SYS_NICE / root
+                log.info("RX thread priority raised")
+            elif sys.platform == "win32":
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 1)  # THREAD_PRIORITY_ABOVE_NORMAL
+                log.info("RX thread priority raised")
+        except Exception as e:
+            log.warning(f"Could not raise RX thread priority: {e}")
+
+    def _wait_readable(self) -> bool:
+        """Block until the link has data. False means disconnect() woke us."""
+        for key, _ in self._sel.select():
+            if key.fileobj is self._wake_r:
+                return False
+        return True
+
+    def _read_serial(self, dest: memoryview) -> int:
+        """Read whatever the serial port has buffered into dest."""
+        data = self._conn.read(min(self._conn.in_waiting or 1, len(dest)))
+        dest[:len(data)] = data
+        return len(data)
+
+    def _read_sock(self, dest: memoryview) -> int:
+        """Read whatever the socket has queued into dest without allocating a buffer."""
+        # One recv_into per selector wakeup hands back everything the kernel has
+        # queued (up to 64 KiB), so a single link needs no io_uring-style batching.
+        try:
+            n = self._conn.recv_into(dest)
+        except (BlockingIOError, socket.timeout):
+            return 0
+        if not n:
+            raise ConnectionError("connection closed by peer")
+        return n
+
+    def _compact_rx(self):
+        """Move the unparsed tail back to offset 0 once the buffer fills up."""
+        head, tail = self._rx_head, self._rx_tail
+        if head == tail:
+            self._rx_head = self._rx_tail = 0
+        elif tail == len(self._rx_buf):
+            if head == 0:
+                log.warning("RX buffer overflow, dropping unframed data")
+                self._rx_head = self._rx_tail = 0
+                return
+            self._rx_buf[:tail - head] = self._rx_buf[head:tail]
+            self._rx_head, self._rx_tail = 0, tail - head
+
+    def _consume(self, off: int, end: int) -> int:
+        """Dispatch every complete frame/line in the RX buffer. Returns new offset."""
+        buf = self._rx_buf
+        while off < end:
+            if buf[off] == EMG_FRAME_TAG:
+                if end - off < EMG_FRAME_SIZE:
+                    break
+                nxt = self._handle_emg_run(off, end) if HAS_NUMBA else self._handle_emg_frame(buf, off)
+                if nxt == off:
+                    # A 0xA5 inside another frame's values, or a corrupt frame:
+                    # step past it and resync on the next tag
+                    self._warn("frame", "%d bad EMG frames (CRC mismatch), resyncing")
+                    nxt = off + 1
+                off = nxt
+            else:
+                # Text never contains the tag byte, so anything before one is
+                # the tail of a frame we joined mid-way
+                nl = buf.find(b"\n", off, end)
+                tag = buf.find(_TAG_BYTE, off, end if nl < 0 else nl)
+                if tag >= 0:
+                    off = tag
+                    continue
+                if nl < 0:
+                    break
+                # Lines that aren't protocol lines (boot banner, a line joined
+                # mid-way) are dropped by _parse_line; the next line may be valid
+                self._parse_line(buf[off:nl].decode("utf-8", errors="ignore").strip())
+                off = nl + 1
+        return off
+
+    def _handle_emg_frame(self, buf: bytearray, off: int) -> int:
+        """Decode one frame; returns the offset after it, or off if it is corrupt."""
+        if not _emg_frame_ok(buf, off):
+            return off
+        raw = _EMG_STRUCT.unpack_from(buf, off)
+        back = self._emg_back()
+        back[:] = raw[1:-1]
+        np.multiply(back, EMG_SCALE, out=back)
+        self._publish_emg(back)
+        return off + EMG_FRAME_SIZE
+
+    def _handle_emg_run(self, off: int, end: int) -> int:
+        """Compiled path: decode all consecutive frames in one call."""
+        off, n = _scan_emg_frames(self._rx_np, off, end, self._emg_rows)
+        for i in range(n):
+            back = self._emg_back()
+            back[:] = self._emg_rows[i]
+            self._publish_emg(back)
+        return off
+
+    def _emg_back(self) -> np.ndarray:
+        return self._emg_bufs[(self._emg_seq + 1) & 1]
+
+    def _publish_emg(self, vals: np.ndarray):
+        """Flip the freshly written back buffer to the front."""
+        self._emg_seq += 1      # single writer; int store is atomic under the GIL
+        if self.on_emg_data:
+            # A failing consumer must not take the RX thread down with it
             try:
-                vals = [float(x) for x in line[4:].split(",")]
-                with self._emg_lock:
-                    self._latest_emg = vals
-                if self.on_emg_data:
-                    self.on_emg_data(vals)
+                self.on_emg_data(vals.tolist())
             except Exception as e:
-                log.warning(f"EMG parse error: {e} | line: {line}")
+                self._warn("callback", "%d EMG callback errors; last: %s", e)
+
+    def _warn(self, kind: str, fmt: str, *args):
+        """log.warning at most once a second per kind; fmt's first %d is the count."""
+        now = time.monotonic()
+        state = self._warn_state.setdefault(kind, [0.0, 0])
+        if now - state[0] > 1.0:
+            log.warning(fmt, state[1] + 1, *args)
+            state[0], state[1] = now, 0
+        else:
+            state[1] += 1
 
-        elif line.startswith("STATUS:"):
-            msg = line[7:]
-            log.info(f"Arduino: {msg}")
-            if self.on_status:
-                self.on_status(msg)
+    def _parse_line(self, line: str):
+        m = _LINE_RE.match(line)
+        if not m:
+            return
+        tag, payload = m.groups()
+        try:
+            self._line_handlers[tag](payload)
+        except Exception as e:
+            self._warn("callback", "%d line handler errors; last: %s", e)
 
-        elif line.startswith("TEST:"):
-            log.info(f"Test mode: {line[5:]}")
+    def _handle_emg_text(self, payload: str):
+        try:
+            vals = np.fromstring(payload, sep=",", dtype=np.float32)
+            if vals.size != payload.count(",") + 1:
+                raise ValueError("malformed value list")
+            back = self._emg_back()
+            n = min(vals.size, NUM_EMG_CHANNELS)
+            back[:n] = vals[:n]
+            back[n:] = 0.0
+            self._publish_emg(back)
+        except Exception as e:
+            self._warn("parse", "%d EMG parse errors; last: %s | line: EMG:%s", e, payload)
 
-    def _transmit_loop(self):
-        while self._running:
-            try:
-                msg = self._tx_queue.get(timeout=0.1)
-                raw = msg.encode("utf-8")
-                if self.mode == "usb":
-                    self._conn.write(raw)
-                else:
-                    self._conn.sendall(raw)
-            except queue.Empty:
-                continue
-            except Exception as e:
-                if self._running:
-                    log.error(f"TX error: {e}")
+    def _handle_status(self, msg: str):
+        if msg == "READY" or msg == "PONG":
+            self._ready.set()
+        elif msg == "PROTO:2":
+            self._servo_binary = True
+        log.info(f"Arduino: {msg}")
+        if self.on_status:
+            self.on_status(msg)
+
+    def _handle_test(self, msg: str):
+        log.info(f"Test mode: {msg}")
 
 
 # ── Convenience factory ───────────────────────────────────────────────────────
@@ -222,7 +595,7 @@ def connect_wifi(host="192.168.1.100") -> ArduinoConnection:
 
 if __name__ == "__main__":
     # Test USB connection
-    import sys
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
     port = sys.argv[1] if len(sys.argv) > 1 else "COM3"
     print(f"Testing connection on {port}...")
 
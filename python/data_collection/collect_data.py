@@ -23,15 +23,24 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-import csv
 import time
+import logging
 import argparse
 import threading
 import numpy as np
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from comms.arduino_link import ArduinoConnection
 
+# Optional: compiles the feature kernels (pip install numba)
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 # ─── GESTURE DEFINITIONS ─────────────────────────────────────────────────────
 GESTURES = {
     0: "REST",
@@ -52,6 +61,13 @@ REPS_PER_GESTURE    = 5        # repetitions
 REST_BETWEEN_REPS   = 2.0      # seconds rest between reps
 COUNTDOWN_SECONDS   = 3        # countdown before each rep
 NUM_CHANNELS        = 8        # EMG channels
+WRITE_BATCH         = 40       # rows per CSV write (1 second at 40Hz)
+FEATURES_PER_CH     = 7        # MAV, RMS, VAR, WL, ZC, SSC, HFD
+CSV_BUFFER          = 1 << 20  # bytes buffered before the OS sees a write
+RUNNING_STATS       = 6        # sum, sum|x|, sum x^2, WL, ZC, SSC (streaming features)
+
+# timestamp, label, channels. EMG arrives in 0.01 steps, so 2 decimals is lossless.
+_ROW_FMT = "{:.6f},{:d}," + ",".join(["{:.2f}"] * NUM_CHANNELS) + "\n"
 
 
 class DataCollector:
@@ -63,11 +79,11 @@ class DataCollector:
         self.arduino = ArduinoConnection(mode="usb", port=port)
         self.collecting = False
         self.current_label = -1
-        self.buffer = []
+        self.buffer = deque()      # filled by the serial thread, drained here
+        self._have_data = threading.Event()
 
         # CSV file
         self.csv_file = None
-        self.csv_writer = None
 
         # Stats
         self.total_samples = 0
@@ -105,14 +121,17 @@ class DataCollector:
         if gesture_ids is None:
             gesture_ids = list(GESTURES.keys())
 
-        for gid in gesture_ids:
-            self.collect_gesture(gid)
-            print()
+        # Finished reps are flushed as they end; the finally keeps them on Ctrl+C
+        try:
+            for gid in gesture_ids:
+                self.collect_gesture(gid)
+                print()
 
-        print(f"\nCollection complete! Total samples: {self.total_samples}")
-        print(f"Saved to: {self.output_path}")
-        self._close_csv()
-        self.arduino.disconnect()
+            print(f"\nCollection complete! Total samples: {self.total_samples}")
+            print(f"Saved to: {self.output_path}")
+        finally:
+            self._close_csv()
+            self.arduino.disconnect()
 
     def collect_gesture(self, gesture_id: int):
         name = GESTURES.get(gesture_id, f"GESTURE_{gesture_id}")
@@ -135,21 +154,29 @@ class DataCollector:
             self.current_label = gesture_id
             self.collecting = True
             rep_samples = 0
+            batch = []
 
             start = time.time()
             while rep_samples < SAMPLES_PER_GESTURE:
-                # EMG callback fills buffer
-                if len(self.buffer) > 0:
-                    row = self.buffer.pop(0)
-                    self.csv_writer.writerow(row)
-                    self.csv_file.flush()
+                # EMG callback fills buffer and wakes us; the timeout only
+                # guards against a missed wakeup
+                self._have_data.wait(timeout=0.1)
+                self._have_data.clear()
+                if not self.buffer:
+                    continue
+                while self.buffer and rep_samples < SAMPLES_PER_GESTURE:
+                    batch.append(self.buffer.popleft())
+                    if len(batch) >= WRITE_BATCH:
+                        self._write_rows(batch)
+                        batch.clear()
                     rep_samples += 1
                     self.total_samples += 1
-                    pct = int(rep_samples / SAMPLES_PER_GESTURE * 20)
-                    print(f"    {'█' * pct}{'░' * (20-pct)} {rep_samples}/{SAMPLES_PER_GESTURE}", end="\r")
-                time.sleep(0.001)
+                pct = int(rep_samples / SAMPLES_PER_GESTURE * 20)
+                print(f"    {'█' * pct}{'░' * (20-pct)} {rep_samples}/{SAMPLES_PER_GESTURE}", end="\r")
 
             self.collecting = False
+            self._write_rows(batch)
+            self.csv_file.flush()
             print(f"    Done! ({rep_samples} samples)                    ")
 
             # Rest between reps
@@ -164,17 +191,22 @@ class DataCollector:
             padded = vals[:NUM_CHANNELS] + [0.0] * max(0, NUM_CHANNELS - len(vals))
             row = [timestamp, self.current_label] + padded
             self.buffer.append(row)
+            self._have_data.set()
 
     def _open_csv(self):
         headers = ["timestamp", "label"] + [f"ch{i}" for i in range(NUM_CHANNELS)]
-        self.csv_file = open(self.output_path, "w", newline="")
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_writer.writerow(headers)
+        self.csv_file = open(self.output_path, "wb", buffering=CSV_BUFFER)
+        self.csv_file.write((",".join(headers) + "\n").encode("ascii"))
         print(f"CSV opened: {self.output_path}")
 
+    def _write_rows(self, rows: list):
+        fmt = _ROW_FMT.format
+        self.csv_file.write("".join([fmt(*row) for row in rows]).encode("ascii"))
+
     def _close_csv(self):
         if self.csv_file:
             self.csv_file.close()
+            self.csv_file = None
             print("CSV saved and closed.")
 
 
@@ -186,24 +218,123 @@ def extract_features(window: np.ndarray) -> np.ndarray:
     window: shape (samples, channels)
     Returns: 1D feature vector
     """
-    features = []
-    for ch in range(window.shape[1]):
-        sig = window[:, ch]
-
-        # Time-domain features
-        mav = np.mean(np.abs(sig))                    # Mean Absolute Value
-        rms = np.sqrt(np.mean(sig**2))                # RMS
-        var = np.var(sig)                             # Variance
-        wl  = np.sum(np.abs(np.diff(sig)))            # Waveform Length
-        zc  = np.sum(np.diff(np.sign(sig)) != 0)     # Zero Crossings
-        ssc = np.sum(np.diff(np.sign(np.diff(sig))) != 0)  # Slope Sign Changes
-
-        # Higuchi Fractal Dimension
-        hfd = higuchi_fd(sig, kmax=5)
+    # float32 end to end: the ADC has ~12 bits, float64 only doubles the traffic
+    window = np.asarray(window, dtype=np.float32)
+    out = np.empty(FEATURES_PER_CH * window.shape[1], dtype=np.float32)
+
+    if HAS_NUMBA:
+        # One fused pass per channel; Fortran order makes window.T C-contiguous
+        nk, lk, sxx = _hfd_fit_axis(window.shape[0], 5)
+        _features_window(np.asfortranarray(window).T, 5, nk, lk, sxx, out)
+        return out
+
+    # Time-domain features, all channels at once (axis 0 = time)
+    dw  = np.diff(window, axis=0)
+    mav = np.abs(window).mean(axis=0)                                  # Mean Absolute Value
+    rms = np.sqrt(np.einsum("ij,ij->j", window, window) / window.shape[0])  # RMS
+    var = window.var(axis=0)                                           # Variance
+    wl  = np.abs(dw).sum(axis=0)                                       # Waveform Length
+    # Sign changes between neighbours, compared directly (no diff temp). The
+    # 3-valued sign is kept on purpose: EMG RMS is >= 0, so the 0 <-> +
+    # transitions are the crossings the classifier was trained on.
+    sgn = np.sign(window)
+    zc  = np.count_nonzero(sgn[1:] != sgn[:-1], axis=0)                # Zero Crossings
+    sgn = np.sign(dw)
+    ssc = np.count_nonzero(sgn[1:] != sgn[:-1], axis=0)                # Slope Sign Changes
+
+    # Higuchi Fractal Dimension
+    hfd = higuchi_fd_multi(window, kmax=5)
+
+    # Per-channel order: MAV, RMS, VAR, WL, ZC, SSC, HFD (float32, as in training)
+    out[0::FEATURES_PER_CH] = mav
+    out[1::FEATURES_PER_CH] = rms
+    out[2::FEATURES_PER_CH] = var
+    out[3::FEATURES_PER_CH] = wl
+    out[4::FEATURES_PER_CH] = zc
+    out[5::FEATURES_PER_CH] = ssc
+    out[6::FEATURES_PER_CH] = hfd
+    return out
+
+
+def _higuchi_lengths(x, kmax, L):
+    """
+    Fill L[:nk] with the mean curve length <L(k)> for k = 1..nk and return nk,
+    the number of k values whose subsequences have at least two points.
+    """
+    n = x.shape[0]
+    nk = 0
+    for k in range(1, kmax + 1):
+        total = 0.0
+        used = 0
+        norm = (n - 1) / k
+        for m in range(k):
+            count = (n - m + k - 1) // k        # len(x[m::k])
+            if count < 2:
+                continue
+            s = 0.0
+            prev = x[m]
+            for i in range(m + k, n, k):
+                s += abs(x[i] - prev)
+                prev = x[i]
+            total += s * norm / count
+            used += 1
+        if used == 0:                           # larger k only get shorter
+            break
+        L[nk] = total / used
+        nk += 1
+    return nk
+
+
+def _higuchi_lengths_multi(W, kmax, L):
+    """_higuchi_lengths for every column of W (Fortran order) into the rows of L."""
+    nk = 0
+    for c in range(W.shape[1]):
+        nk = _higuchi_lengths(W[:, c], kmax, L[c])
+    return nk
+
+
+if HAS_NUMBA:
+    _higuchi_lengths = njit(cache=True, fastmath=True)(_higuchi_lengths)
+    _higuchi_lengths_multi = njit(cache=True, fastmath=True)(_higuchi_lengths_multi)
+
+
+@lru_cache(maxsize=None)
+def _centered_log_k(nk: int) -> tuple:
+    """log(k) for k = 1..nk minus its mean, and its sum of squares (fit x-axis)."""
+    lk = np.log(np.arange(1, nk + 1, dtype=float))
+    lk -= lk.mean()
+    lk.flags.writeable = False
+    return lk, float(lk @ lk)
+
+
+def _hfd_fit_axis(T: int, kmax: int) -> tuple:
+    """(nk, lk, sxx) for the compiled kernels: k values with >= 2 points and their fit axis."""
+    nk = min(kmax, T - 1)
+    if nk >= 2:
+        lk, sxx = _centered_log_k(nk)
+        return nk, lk, sxx
+    return nk, np.zeros(1), 0.0
+
+
+def higuchi_fd_multi(window: np.ndarray, kmax: int = 5) -> np.ndarray:
+    """
+    Higuchi's Fractal Dimension of every channel of window (samples, channels)
+    in one compiled call. Returns shape (channels,).
+    """
+    # One dtype/layout so the compiled kernel is specialised exactly once;
+    # Fortran order makes each channel contiguous
+    W = np.asfortranarray(window, dtype=np.float32)
+    L = np.empty((W.shape[1], kmax))
+    nk = _higuchi_lengths_multi(W, kmax, L)
 
-        features.extend([mav, rms, var, wl, zc, ssc, hfd])
+    if nk < 2:
+        return np.zeros(W.shape[1])
 
-    return np.array(features)
+    # Slope of log(L) vs log(1/k) = fractal dimension. Closed-form least
+    # squares per row, so a degenerate channel can't spoil the others' fit.
+    # The epsilon matches training: a flat channel gives 0, not NaN.
+    lk, sxx = _centered_log_k(nk)
+    return np.abs(np.log(L[:, :nk] + 1e-10) @ lk / sxx)
 
 
 def higuchi_fd(x: np.ndarray, kmax: int = 5) -> float:
@@ -212,33 +343,230 @@ def higuchi_fd(x: np.ndarray, kmax: int = 5) -> float:
     This is a key feature from your whiteboard - it measures signal complexity.
     Higher HFD = more complex/irregular signal (like during strong muscle contraction).
     """
-    n = len(x)
-    L = []
-    x_arr = np.array(x)
+    return float(higuchi_fd_multi(np.reshape(x, (-1, 1)), kmax)[0])
+
+
+def warmup_features(window_size: int = 40, num_channels: int = NUM_CHANNELS):
+    """
+    Compile (or load from numba's cache) the feature kernels now, so the first
+    live window doesn't stall for it. A no-op cost without numba.
+    """
+    window = np.zeros((window_size, num_channels), dtype=np.float32)
+    extract_features(window)
+    if HAS_NUMBA:
+        stats = new_running_stats(num_channels)
+        reset_running_stats(window, window_size, window_size, stats)
+        update_running_stats(window, window_size - 1, window_size, window_size - 1, stats)
+        extract_features_running(stats, window)
+
+
+def extract_features_batch(windows: np.ndarray, kmax: int = 5) -> np.ndarray:
+    """
+    extract_features for a stack of windows, shape (N, samples, channels).
+    Returns (N, 7 * channels) float32, row i == extract_features(windows[i]).
+    """
+    windows = np.asarray(windows)
+    N, T, C = windows.shape
+    out = np.empty((N, FEATURES_PER_CH * C), dtype=np.float32)
+    if not HAS_NUMBA:
+        for i in range(N):
+            out[i] = extract_features(windows[i])
+        return out
+
+    # (N, channels, samples): every channel's signal is one contiguous run
+    W = np.ascontiguousarray(np.swapaxes(windows, 1, 2), dtype=np.float32)
+
+    nk, lk, sxx = _hfd_fit_axis(T, kmax)
+    _features_batch(W, kmax, nk, lk, sxx, out)
+    return out
 
-    for k in range(1, kmax + 1):
-        Lk = []
-        for m in range(1, k + 1):
-            # Build subsequence
-            idxs = np.arange(m - 1, n, k)
-            if len(idxs) < 2:
-                continue
-            subseq = x_arr[idxs]
-            Lmk = np.sum(np.abs(np.diff(subseq))) * (n - 1) / (k * len(idxs))
-            Lk.append(Lmk)
-        if Lk:
-            L.append(np.mean(Lk))
 
-    if len(L) < 2:
-        return 0.0
+def _sign(v):
+    return 1 if v > 0 else (-1 if v < 0 else 0)
 
-    # Slope of log(L) vs log(1/k) = fractal dimension
-    ks = np.arange(1, len(L) + 1, dtype=float)
-    try:
-        coeffs = np.polyfit(np.log(ks), np.log(L), 1)
-        return abs(coeffs[0])
-    except:
-        return 0.0
+
+def _features_window(W, kmax, nk, lk, sxx, out):
+    """
+    Compiled body of extract_features for one window, W is (channels, samples).
+    All six time-domain features come from a single pass over each signal
+    (variance via Welford's update), then HFD reuses the same signal.
+    """
+    C, T = W.shape
+    L = np.empty(kmax)
+    for c in range(C):
+        s = W[c]
+        prev = s[0]
+        sa = abs(prev)
+        sq = prev * prev
+        mean = prev
+        m2 = 0.0
+        wl = 0.0
+        zc = 0
+        ssc = 0
+        sgn = _sign(prev)
+        dsgn = 0
+        for t in range(1, T):
+            v = s[t]
+            dv = v - prev
+            sa += abs(v)
+            sq += v * v
+            delta = v - mean
+            mean += delta / (t + 1)
+            m2 += delta * (v - mean)
+            wl += abs(dv)
+            g = _sign(v)
+            if g != sgn:
+                zc += 1
+            sgn = g
+            g = _sign(dv)
+            if t > 1 and g != dsgn:
+                ssc += 1
+            dsgn = g
+            prev = v
+
+        hfd = 0.0
+        if nk >= 2:
+            _higuchi_lengths(s, kmax, L)
+            sxy = 0.0
+            for j in range(nk):
+                sxy += np.log(L[j] + 1e-10) * lk[j]
+            hfd = abs(sxy / sxx)
+
+        o = c * 7
+        out[o] = sa / T
+        out[o + 1] = np.sqrt(sq / T)
+        out[o + 2] = m2 / T
+        out[o + 3] = wl
+        out[o + 4] = zc
+        out[o + 5] = ssc
+        out[o + 6] = hfd
+
+
+def _features_batch(W, kmax, nk, lk, sxx, out):
+    """Compiled body of extract_features_batch. W is (N, channels, samples); the windows are independent."""
+    for w in prange(W.shape[0]):
+        _features_window(W[w], kmax, nk, lk, sxx, out[w])
+
+
+if HAS_NUMBA:
+    _sign = njit(cache=True, inline="always")(_sign)
+    _features_window = njit(cache=True)(_features_window)
+    _features_batch = njit(cache=True, parallel=True)(_features_batch)
+
+
+# ─── STREAMING FEATURES ──────────────────────────────────────────────────────
+# Live inference slides its window a few samples at a time. The six
+# time-domain features are kept as running float64 sums over a ring of
+# samples (rows, channels), advanced by just the new samples, instead of
+# re-summed per window. Row t of the stream lives at ring[t % len(ring)].
+# HFD still needs the whole window.
+
+def new_running_stats(num_channels: int = NUM_CHANNELS) -> np.ndarray:
+    """Zeroed (RUNNING_STATS, channels) accumulator for update_running_stats."""
+    return np.zeros((RUNNING_STATS, num_channels))
+
+
+def _running_add(ring, t, first, stats, sgn):
+    """Add (sgn=1) or remove (sgn=-1) sample t and the pair/triple ending at it, if they start >= first."""
+    R = ring.shape[0]
+    for c in range(ring.shape[1]):
+        x = np.float64(ring[t % R, c])
+        stats[0, c] += sgn * x
+        stats[1, c] += sgn * abs(x)
+        stats[2, c] += sgn * x * x
+        if t - 1 >= first:
+            p = np.float64(ring[(t - 1) % R, c])
+            d = x - p
+            stats[3, c] += sgn * abs(d)
+            if _sign(x) != _sign(p):
+                stats[4, c] += sgn
+            if t - 2 >= first:
+                if _sign(d) != _sign(p - ring[(t - 2) % R, c]):
+                    stats[5, c] += sgn
+
+
+def _running_drop(ring, e, last, stats):
+    """Remove sample e (the oldest of window e..last) with its pair and triple."""
+    R = ring.shape[0]
+    for c in range(ring.shape[1]):
+        x = np.float64(ring[e % R, c])
+        stats[0, c] -= x
+        stats[1, c] -= abs(x)
+        stats[2, c] -= x * x
+        if e + 1 <= last:
+            n1 = np.float64(ring[(e + 1) % R, c])
+            d = n1 - x
+            stats[3, c] -= abs(d)
+            if _sign(x) != _sign(n1):
+                stats[4, c] -= 1
+            if e + 2 <= last:
+                if _sign(ring[(e + 2) % R, c] - n1) != _sign(d):
+                    stats[5, c] -= 1
+
+
+def update_running_stats(ring, start, count, window_size, stats):
+    """
+    Slide stats from the window ending at sample start - 1 to the one ending
+    at count - 1. The ring must still hold samples start - window_size and on,
+    i.e. have at least window_size + (count - start) rows.
+    """
+    for t in range(start, count):
+        if t >= window_size:
+            _running_drop(ring, t - window_size, t - 1, stats)
+        _running_add(ring, t, max(0, t - window_size + 1), stats, 1.0)
+
+
+def reset_running_stats(ring, count, window_size, stats):
+    """Recompute stats from scratch for the window ending at sample count - 1 (clears drift)."""
+    stats[:] = 0.0
+    first = max(0, count - window_size)
+    for t in range(first, count):
+        _running_add(ring, t, first, stats, 1.0)
+
+
+def _features_running(stats, W, kmax, nk, lk, sxx, out):
+    """Feature vector from running stats; W is the window as (channels, samples), for HFD."""
+    C, T = W.shape
+    L = np.empty(kmax)
+    for c in range(C):
+        mean = stats[0, c] / T
+        msq = stats[2, c] / T
+        hfd = 0.0
+        if nk >= 2:
+            _higuchi_lengths(W[c], kmax, L)
+            sxy = 0.0
+            for j in range(nk):
+                sxy += np.log(L[j] + 1e-10) * lk[j]
+            hfd = abs(sxy / sxx)
+
+        o = c * 7
+        out[o] = stats[1, c] / T
+        out[o + 1] = np.sqrt(msq)
+        out[o + 2] = max(msq - mean * mean, 0.0)
+        out[o + 3] = stats[3, c]
+        out[o + 4] = stats[4, c]
+        out[o + 5] = stats[5, c]
+        out[o + 6] = hfd
+
+
+if HAS_NUMBA:
+    _running_add = njit(cache=True)(_running_add)
+    _running_drop = njit(cache=True)(_running_drop)
+    update_running_stats = njit(cache=True)(update_running_stats)
+    reset_running_stats = njit(cache=True)(reset_running_stats)
+    _features_running = njit(cache=True)(_features_running)
+
+
+def extract_features_running(stats: np.ndarray, window: np.ndarray) -> np.ndarray:
+    """
+    extract_features(window) for a window whose running stats are in stats
+    (see update_running_stats). Only HFD reads the samples.
+    """
+    window = np.asarray(window, dtype=np.float32)
+    out = np.empty(FEATURES_PER_CH * window.shape[1], dtype=np.float32)
+    nk, lk, sxx = _hfd_fit_axis(window.shape[0], 5)
+    _features_running(stats, np.asfortranarray(window).T, 5, nk, lk, sxx, out)
+    return out
 
 
 # ─── MAIN ────────────────────────────────────────────────────────────────────
@@ -255,6 +583,7 @@ if __name__ == "__main__":
     parser.add_argument("--sim", action="store_true",
                         help="Use hardware simulator instead of real Arduino")
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 
     if args.sim:
         args.port = "SIMULATOR"
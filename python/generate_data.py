@@ -2,18 +2,19 @@ import pandas as pd
 import numpy as np
 import os
 
-rows = []
-for label in range(10):
-    for i in range(500):
-        if label == 0:
-            base = [10, 10, 10, 10, 10, 10, 10, 10]
-        else:
-            base = [label * 25 + np.random.randint(0, 30) for _ in range(8)]
-        row = [0, label] + [max(0, v + np.random.randn() * 10) for v in base]
-        rows.append(row)
+N_LABELS, N_PER_LABEL, N_CH = 10, 500, 8
 
-cols = ["timestamp", "label"] + ["ch" + str(i) for i in range(8)]
-df = pd.DataFrame(rows, columns=cols)
+rng = np.random.default_rng()
+labels = np.repeat(np.arange(N_LABELS), N_PER_LABEL)
+n = labels.size
+# REST sits flat at 10; every other gesture at label*25 plus a per-sample offset
+base = np.where(labels[:, None] == 0, 10, labels[:, None] * 25 + rng.integers(0, 30, (n, N_CH)))
+vals = np.maximum(0, base + rng.standard_normal((n, N_CH)) * 10)
+
+cols = ["timestamp", "label"] + ["ch" + str(i) for i in range(N_CH)]
+df = pd.DataFrame(vals, columns=cols[2:])
+df.insert(0, "label", labels)
+df.insert(0, "timestamp", 0)
 os.makedirs("data", exist_ok=True)
 df.to_csv("data/test_session.csv", index=False)
-print("Done! " + str(len(df)) + " samples saved.")
\ No newline at end of file
+print("Done! " + str(len(df)) + " samples saved.")
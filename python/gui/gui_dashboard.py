@@ -9,20 +9,18 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import tkinter as tk
 import threading
 import time
+import logging
 import argparse
+import numpy as np
 from collections import deque
 
 from comms.arduino_link import ArduinoConnection
 
-try:
-    from model.inference import GestureInferenceEngine
-    HAS_MODEL = True
-except ImportError:
-    HAS_MODEL = False
-
 NUM_CHANNELS  = 8
 HISTORY_LEN   = 100
 UPDATE_MS     = 100
+OVERRUN_MS    = 100     # a paint slower than this backs the next frame off
+LOG_LINES     = 200
 
 CHANNEL_COLORS = [
     "#FF6B6B", "#4ECDC4", "#45B7D1", "#FFA07A",
@@ -55,8 +53,20 @@ class BioForgeDashboard:
         self.root.configure(bg=DARK_BG)
         self.root.geometry("1280x800")
 
-        self.emg_history = [deque([0.0] * HISTORY_LEN, maxlen=HISTORY_LEN)
-                            for _ in range(NUM_CHANNELS)]
+        # Samples from the serial thread wait here until the Tk thread drains them;
+        # anything older than a full history would be scrolled off anyway
+        self._emg_q = deque(maxlen=HISTORY_LEN)
+        # EMG history ring: one row per channel, column _emg_write % HISTORY_LEN is next
+        self._emg_buf = np.zeros((NUM_CHANNELS, HISTORY_LEN), dtype=np.float32)
+        self._emg_write = 0
+        self._emg_view = np.empty_like(self._emg_buf)    # ring unrolled, oldest first
+        # Trace coordinates (x0, y0, x1, y1, ...) per channel, fixed length.
+        # x only depends on canvas width, so it is rewritten on resize only.
+        self._emg_points = np.zeros((NUM_CHANNELS, 2 * HISTORY_LEN), dtype=np.float32)
+        self._emg_sizes = [(0, 0)] * NUM_CHANNELS
+        self._emg_tail = np.empty(2 * HISTORY_LEN, dtype=np.float32)  # newest points only
+        self._x_idx = np.arange(HISTORY_LEN, dtype=np.float32)
+        self._emg_drawn = 0          # _emg_write as of the last repaint
         self.connected = False
         self.arduino = None
         self.engine = None
@@ -66,6 +76,21 @@ class BioForgeDashboard:
         self.mode = tk.StringVar(value="collect")
         self.servo_angles = [90] * 15
 
+        # Repaint only what changed since the last tick (new EMG = non-empty _emg_q)
+        self._dirty_gesture = True
+        self._dirty_servo = True
+        self._last_servo_angles = np.full(15, -1, dtype=np.int16)
+        self._last_gesture_text = None
+        self._last_conf_pct = -1
+        self._last_conf_px = -1
+        # Canvas sizes from <Configure> events, so repaints don't query Tk
+        self._sizes = {}
+        self._last_paint = 0.0
+
+        # Log lines are buffered here and rendered into the Text widget once per tick
+        self._log_buf = deque(maxlen=LOG_LINES)
+        self._log_dirty = False
+
         self._build_ui()
 
         # Wait 800ms for window to fully render, then auto-connect
@@ -122,6 +147,7 @@ class BioForgeDashboard:
                  bg=DARK_BG, fg=TEXT_COLOR).pack(anchor=tk.W, pady=(0, 4))
 
         self.emg_canvases = []
+        self.emg_lines = []
         for i in range(NUM_CHANNELS):
             row = tk.Frame(parent, bg=DARK_BG)
             row.pack(fill=tk.X, pady=2)
@@ -131,6 +157,10 @@ class BioForgeDashboard:
                           highlightbackground="#444466")
             c.pack(fill=tk.X, expand=True, padx=(4, 0))
             self.emg_canvases.append(c)
+            self._track_size(c)
+            # One persistent trace per channel; _update only moves its points
+            self.emg_lines.append(c.create_line(self._emg_points[i].tolist(),
+                                                fill=CHANNEL_COLORS[i], width=1))
 
     def _build_gesture_panel(self, parent):
         tk.Label(parent, text="Current Gesture", font=("Helvetica", 11, "bold"),
@@ -152,6 +182,9 @@ class BioForgeDashboard:
         self.conf_canvas = tk.Canvas(parent, height=16, bg="#111122",
                                      highlightthickness=0)
         self.conf_canvas.pack(fill=tk.X, pady=(0, 8))
+        self._track_size(self.conf_canvas)
+        # Persistent bar, resized with coords() instead of delete/create
+        self.conf_bar = self.conf_canvas.create_rectangle(0, 0, 0, 0, fill=ACCENT, outline="")
 
         tk.Frame(parent, bg="#444466", height=1).pack(fill=tk.X, pady=8)
 
@@ -169,6 +202,7 @@ class BioForgeDashboard:
 
         self.servo_labels = []
         self.servo_canvases = []
+        self.servo_bars = []
 
         for i, name in enumerate(servo_names):
             row = tk.Frame(parent, bg=PANEL_BG)
@@ -182,7 +216,9 @@ class BioForgeDashboard:
                            fg=YELLOW, font=("Helvetica", 8))
             lbl.pack(side=tk.LEFT)
             self.servo_canvases.append(c)
+            self._track_size(c)
             self.servo_labels.append(lbl)
+            self.servo_bars.append(c.create_rectangle(0, 0, 0, 0, fill=ACCENT, outline=""))
 
         tk.Frame(parent, bg="#444466", height=1).pack(fill=tk.X, pady=8)
 
@@ -208,7 +244,8 @@ class BioForgeDashboard:
         tk.Label(parent, text="Log", font=("Helvetica", 10, "bold"),
                  bg=PANEL_BG, fg=TEXT_COLOR).pack(anchor=tk.W, pady=(8, 2))
         self.log_text = tk.Text(parent, height=5, width=35, bg="#0D0D1A",
-                                fg=TEXT_COLOR, font=("Courier", 8), relief=tk.FLAT)
+                                fg=TEXT_COLOR, font=("Courier", 8), relief=tk.FLAT,
+                                state=tk.DISABLED)
         self.log_text.pack(fill=tk.X)
 
     def _toggle_connection(self):
@@ -237,7 +274,7 @@ class BioForgeDashboard:
         self.status_dot.config(fg=GREEN)
         self.conn_btn.config(text="Disconnect")
         self._log("Connected!")
-        if self.model_path and HAS_MODEL:
+        if self.model_path:
             self.root.after(500, self._start_inference)
 
     def _disconnect(self):
@@ -253,10 +290,27 @@ class BioForgeDashboard:
         self._log("Disconnected.")
 
     def _on_emg_data(self, vals):
-        for i in range(min(len(vals), NUM_CHANNELS)):
-            self.emg_history[i].append(vals[i])
+        # Serial thread: hand off only; the ring is owned by the Tk thread
+        self._emg_q.append(vals)
+
+    def _drain_emg(self):
+        """Move queued samples into the history ring (Tk thread)."""
+        q, buf = self._emg_q, self._emg_buf
+        write = self._emg_write
+        while q:
+            vals = q.popleft()
+            n = min(len(vals), NUM_CHANNELS)
+            buf[:n, write % HISTORY_LEN] = vals[:n]
+            write += 1
+        self._emg_write = write
 
     def _start_inference(self):
+        # Imported here so the dashboard starts without sklearn when no model is used
+        try:
+            from model.inference import GestureInferenceEngine
+        except ImportError as e:
+            self._log("No model support: " + str(e))
+            return
         try:
             self.engine = GestureInferenceEngine(
                 model_path=self.model_path,
@@ -271,8 +325,10 @@ class BioForgeDashboard:
     def _on_gesture_change(self, gid, name, conf):
         self.current_gesture = name
         self.confidence = conf
+        self._dirty_gesture = True
         if self.engine:
             self.servo_angles = self.engine.servo_map.get(gid, [90] * 15)
+            self._dirty_servo = True
 
     def _on_mode_change(self):
         mode_map = {"collect": 0, "control": 1, "test": 2}
@@ -284,71 +340,165 @@ class BioForgeDashboard:
         if self.arduino:
             self.arduino.reset_servos()
             self.servo_angles = [90] * 15
+            self._dirty_servo = True
 
     def _start_update_loop(self):
         self._update()
 
     def _update(self):
+        now = time.perf_counter()
+        since = (now - self._last_paint) * 1000.0
+        if since < UPDATE_MS * 0.9:
+            # Woke early (timer backlog): wait out the rest of this frame
+            self.root.after(max(1, int(UPDATE_MS - since)), self._update)
+            return
+        self._last_paint = now
+        # Paint once pending input events have been handled
+        self.root.after_idle(self._paint)
+
+    def _paint(self):
         try:
-            # Draw EMG graphs
-            for i in range(NUM_CHANNELS):
-                c = self.emg_canvases[i]
-                w = c.winfo_width()
-                h = c.winfo_height()
-                c.delete("all")
-                if w < 4 or h < 4:
-                    continue
-                data = list(self.emg_history[i])
-                if len(data) < 2:
-                    continue
-                step = w / len(data)
-                points = []
-                for j, v in enumerate(data):
-                    x = j * step
-                    y = h - max(1, min(h - 1, (v / 512.0) * h))
-                    points.extend([x, y])
-                if len(points) >= 4:
-                    c.create_line(points, fill=CHANNEL_COLORS[i], width=1)
-
-            # Gesture label
-            display = GESTURE_NAMES.get(self.current_gesture, self.current_gesture)
-            self.gesture_label.config(text=display)
-            self.conf_label.config(text=str(int(self.confidence * 100)) + "%")
-
-            # Confidence bar
-            self.conf_canvas.delete("all")
-            cw = self.conf_canvas.winfo_width()
-            ch = self.conf_canvas.winfo_height()
-            if cw > 4 and self.confidence > 0:
-                fw = int(cw * self.confidence)
-                self.conf_canvas.create_rectangle(0, 0, fw, ch, fill=ACCENT, outline="")
-
-            # Servo bars
-            for i in range(len(self.servo_canvases)):
-                c = self.servo_canvases[i]
-                lbl = self.servo_labels[i]
-                angle = self.servo_angles[i] if i < len(self.servo_angles) else 90
-                lbl.config(text=str(angle))
-                c.delete("all")
-                cw = c.winfo_width()
-                ch = c.winfo_height()
-                if cw > 4:
-                    fw = int((angle / 180.0) * cw)
-                    if fw > 0:
-                        c.create_rectangle(0, 0, fw, ch, fill=ACCENT, outline="")
+            if self._emg_q:
+                self._drain_emg()
+                self._draw_emg()
+            if self._dirty_gesture:
+                self._dirty_gesture = False
+                self._draw_gesture()
+            if self._dirty_servo:
+                self._dirty_servo = False
+                self._draw_servos()
+            if self._log_dirty:
+                self._log_dirty = False
+                self._draw_log()
 
         except Exception as e:
             print("UPDATE ERROR: " + str(e))
 
-        self.root.after(UPDATE_MS, self._update)
+        frame_ms = (time.perf_counter() - self._last_paint) * 1000.0
+        if frame_ms > OVERRUN_MS:
+            delay = 2 * UPDATE_MS       # overloaded: skip a frame, then recover
+        else:
+            delay = UPDATE_MS - frame_ms
+        self.root.after(max(1, int(delay)), self._update)
+
+    def _draw_emg(self):
+        # Scroll each trace by the samples that arrived since the last repaint:
+        # shift the line left, drop its oldest points, append the new ones.
+        # Only a resize or a full history's worth of new data redraws it all.
+        write = self._emg_write
+        new = write - self._emg_drawn
+        self._emg_drawn = write
+        if new <= 0:
+            return
+        full = new >= HISTORY_LEN
+        history = None
+        cols = np.arange(write - new, write) % HISTORY_LEN
+
+        for i in range(NUM_CHANNELS):
+            c = self.emg_canvases[i]
+            w, h = self._canvas_size(c)
+            if w < 4 or h < 4:
+                continue
+            line = self.emg_lines[i]
+            dx = w / HISTORY_LEN
+            if full or (w, h) != self._emg_sizes[i]:
+                if history is None:
+                    history = self._unroll_emg(write)
+                points = self._emg_points[i]
+                np.multiply(self._x_idx, dx, out=points[0::2])
+                self._trace_y(history[i], h, points[1::2])
+                c.coords(line, points.tolist())
+                self._emg_sizes[i] = (w, h)
+                continue
+            tail = self._emg_tail[:2 * new]
+            np.multiply(self._x_idx[HISTORY_LEN - new:], dx, out=tail[0::2])
+            self._trace_y(self._emg_buf[i, cols], h, tail[1::2])
+            c.move(line, -new * dx, 0)
+            c.dchars(line, 0, 2 * new - 1)
+            c.insert(line, "end", tail.tolist())
+
+    @staticmethod
+    def _trace_y(samples, h, out):
+        """Canvas y for samples (0..512 full scale, clamped inside the canvas), in place."""
+        np.multiply(samples, h / 512.0, out=out)
+        np.clip(out, 1, h - 1, out=out)
+        np.subtract(h, out, out=out)
+
+    def _unroll_emg(self, write):
+        """The ring oldest-first, via two slice copies (no np.roll temp)."""
+        k = write % HISTORY_LEN
+        history = self._emg_view
+        history[:, :HISTORY_LEN - k] = self._emg_buf[:, k:]
+        history[:, HISTORY_LEN - k:] = self._emg_buf[:, :k]
+        return history
+
+    def _draw_gesture(self):
+        # The engine re-reports the same gesture often; touch only what changed
+        display = GESTURE_NAMES.get(self.current_gesture, self.current_gesture)
+        if display != self._last_gesture_text:
+            self.gesture_label.config(text=display)
+            self._last_gesture_text = display
+        pct = int(self.confidence * 100)
+        if pct != self._last_conf_pct:
+            self.conf_label.config(text=str(pct) + "%")
+            self._last_conf_pct = pct
+
+        # Confidence bar
+        cw, ch = self._canvas_size(self.conf_canvas)
+        if cw <= 4:
+            self._dirty_gesture = True  # not laid out yet, retry next tick
+            return
+        fw = int(cw * max(self.confidence, 0.0))
+        if fw != self._last_conf_px:
+            self.conf_canvas.coords(self.conf_bar, 0, 0, fw, ch)
+            self._last_conf_px = fw
+
+    def _draw_servos(self):
+        angles = np.full(len(self.servo_canvases), 90, dtype=np.int16)
+        n = min(len(self.servo_angles), len(angles))
+        angles[:n] = self.servo_angles[:n]
+
+        # Touch only the servos whose angle actually changed
+        for i in np.flatnonzero(angles != self._last_servo_angles):
+            c = self.servo_canvases[i]
+            angle = int(angles[i])
+            cw, ch = self._canvas_size(c)
+            if cw <= 4:
+                self._dirty_servo = True  # not laid out yet, retry next tick
+                continue
+            self.servo_labels[i].config(text=str(angle))
+            fw = int((angle / 180.0) * cw)
+            c.coords(self.servo_bars[i], 0, 0, fw, ch)
+            self._last_servo_angles[i] = angle
+
+    def _track_size(self, c):
+        c.bind("<Configure>", lambda e, c=c: self._on_resize(c, e.width, e.height))
+
+    def _on_resize(self, c, w, h):
+        self._sizes[c] = (w, h)
+        # Bars are drawn in pixels, so a resize invalidates them
+        self._last_servo_angles[:] = -1
+        self._last_conf_px = -1
+        self._dirty_servo = True
+        self._dirty_gesture = True
+
+    def _canvas_size(self, c):
+        size = self._sizes.get(c)
+        if size is None:  # no <Configure> yet
+            return c.winfo_width(), c.winfo_height()
+        return size
+
+    def _draw_log(self):
+        self.log_text.configure(state=tk.NORMAL)
+        self.log_text.delete("1.0", tk.END)
+        self.log_text.insert(tk.END, "\n".join(self._log_buf))
+        self.log_text.configure(state=tk.DISABLED)
+        self.log_text.see(tk.END)
 
     def _log(self, msg):
         timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, "[" + timestamp + "] " + msg + "\n")
-        self.log_text.see(tk.END)
-        lines = int(self.log_text.index("end-1c").split(".")[0])
-        if lines > 100:
-            self.log_text.delete("1.0", "20.0")
+        self._log_buf.append("[" + timestamp + "] " + msg)
+        self._log_dirty = True
 
 
 def main():
@@ -357,6 +507,7 @@ def main():
     parser.add_argument("--model", type=str, default=None)
     parser.add_argument("--sim", action="store_true")
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 
     if args.sim:
         args.port = "SIMULATOR"
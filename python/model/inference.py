@@ -17,16 +17,39 @@ import pickle
 import time
 import logging
 import argparse
-import threading
-from collections import deque
+
+# Optional: caps BLAS threads for the tiny live matmuls (ships with scikit-learn)
+try:
+    from threadpoolctl import threadpool_limits
+    HAS_THREADPOOLCTL = True
+except ImportError:
+    HAS_THREADPOOLCTL = False
 
 from comms.arduino_link import ArduinoConnection
-from data_collection.collect_data import extract_features
+from data_collection.collect_data import (
+    FEATURES_PER_CH, HAS_NUMBA, extract_features, extract_features_running,
+    new_running_stats, reset_running_stats, update_running_stats, warmup_features,
+)
 
 log = logging.getLogger("BioForge.Inference")
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 
 
+def _activate(name: str, x: np.ndarray):
+    """sklearn MLP activation, in place."""
+    if name == "relu":
+        np.maximum(x, 0, out=x)
+    elif name == "tanh":
+        np.tanh(x, out=x)
+    elif name == "logistic":
+        np.negative(x, out=x)
+        np.exp(x, out=x)
+        x += 1
+        np.reciprocal(x, out=x)
+    elif name != "identity":
+        raise ValueError(f"Unsupported activation: {name}")
+
+
 class GestureInferenceEngine:
     """
     Continuously reads EMG, extracts features in a sliding window,
@@ -38,7 +61,9 @@ class GestureInferenceEngine:
                  arduino: ArduinoConnection,
                  window_size: int = 40,
                  step_size: int = 5,
-                 smoothing: int = 5):
+                 smoothing: int = 5,
+                 batch_size: int = 1,
+                 max_latency_ms: float = 100.0):
         """
         Args:
             model_path:  Path to saved .pkl model bundle
@@ -46,11 +71,15 @@ class GestureInferenceEngine:
             window_size: Samples per inference window (must match training)
             step_size:   Samples between inferences (lower = more responsive)
             smoothing:   Number of consecutive same predictions to confirm gesture
+            batch_size:  Windows classified per MLP call (1 = lowest latency)
+            max_latency_ms: Longest a queued window waits for its batch to fill
         """
         self.arduino = arduino
         self.window_size = window_size
         self.step_size = step_size
         self.smoothing = smoothing
+        self.batch_size = max(1, batch_size)
+        self.max_latency_ms = max_latency_ms
 
         # Load model
         log.info(f"Loading model: {model_path}")
@@ -62,21 +91,63 @@ class GestureInferenceEngine:
         self.gesture_map  = bundle["gesture_map"]
         self.servo_map    = bundle["servo_map"]
         self.num_channels = bundle.get("num_channels", 8)
+        # Windows quieter than this are REST without running the MLP (None = off)
+        self.rest_threshold = bundle.get("rest_threshold")
 
         log.info(f"Model loaded. Gestures: {list(self.gesture_map.values())}")
 
-        # Rolling EMG buffer
-        self._emg_buffer = deque(maxlen=window_size * 2)
+        # StandardScaler applied in place: (x - mean) * (1 / scale), one row per
+        # queued window; the MLP runs once the batch is full (or too old)
+        self._mean = self.scaler.mean_.astype(np.float32)
+        self._inv_scale = (1.0 / self.scaler.scale_).astype(np.float32)
+        self._feat_buf = np.empty((self.batch_size, len(self._mean)), dtype=np.float32)
+        self._pending = 0
+        self._pending_since = 0.0
+
+        # MLP weights for a plain numpy forward pass (no sklearn per-call overhead)
+        self._weights = [w.astype(np.float32) for w in self.mlp.coefs_]
+        self._biases = [b.astype(np.float32) for b in self.mlp.intercepts_]
+        self._layers = [np.empty((self.batch_size, w.shape[1]), dtype=np.float32)
+                        for w in self._weights]
+
+        # Output the rest gate emits: certain REST (label 0)
+        classes = list(self.mlp.classes_)
+        if 0 not in classes:
+            self.rest_threshold = None
+        self._rest_probs = np.zeros(len(classes), dtype=np.float32)
+        if self.rest_threshold is not None:
+            self._rest_probs[classes.index(0)] = 1.0
+
+        # JIT-compile feature extraction before the first real window
+        warmup_features(window_size, self.num_channels)
+
+        # Rolling EMG buffer: ring of rows, row _sample_count % len is next.
+        # The newest window is copied out into a reused column-major scratch
+        # array so each channel is contiguous for the per-channel reductions.
+        self._ring = np.zeros((window_size * 2, self.num_channels), dtype=np.float32)
+        self._window = np.empty((window_size, self.num_channels), dtype=np.float32, order="F")
         self._sample_count = 0
+        self._last_processed = 0
+
+        # Running sums for the time-domain features, advanced by the new
+        # samples each window, so only HFD needs a pass over the window. This
+        # only pays off compiled; without numba each window is extracted whole.
+        self._stats = new_running_stats(self.num_channels) if HAS_NUMBA else None
+        self._stats_count = 0       # samples folded into _stats
 
-        # Prediction smoothing (vote over last N predictions)
-        self._pred_history = deque(maxlen=smoothing)
+        # Prediction smoothing: ring of the last N predictions plus running
+        # per-class vote counts, so the majority is one argmax per step
+        self._history = np.zeros(max(1, smoothing), dtype=np.intp)
+        self._history_len = 0
+        self._history_pos = 0
+        self._vote_counts = np.zeros(len(self.mlp.classes_), dtype=np.int16)
 
         # State
         self.current_gesture = -1
         self.current_gesture_name = "UNKNOWN"
         self.confidence = 0.0
         self.running = False
+        self._blas_limits = None        # threadpool_limits held while running
 
         # Callbacks
         self.on_gesture_change = None   # called when gesture changes
@@ -86,88 +157,166 @@ class GestureInferenceEngine:
         self.last_inference_time = 0.0
 
     def start(self):
-        """Start the inference loop."""
+        """Start inference; it runs on the arduino's receive callback."""
+        # A batch of a few rows is far too small for a BLAS thread pool: its
+        # wakeups cost more than the matmul. Then run the MLP once so the first
+        # real window doesn't pay for lazy BLAS setup.
+        if HAS_THREADPOOLCTL:
+            self._blas_limits = threadpool_limits(1, user_api="blas")
+        self._feat_buf.fill(0.0)
+        self._predict_proba(self._feat_buf)
+
         self.running = True
         self.arduino.on_emg_data = self._on_emg_sample
         self.arduino.set_mode(1)  # control mode
         log.info("Inference engine started. Waiting for EMG data...")
 
-        self._infer_thread = threading.Thread(target=self._inference_loop, daemon=True)
-        self._infer_thread.start()
-
     def stop(self):
         self.running = False
         self.arduino.set_mode(0)
         self.arduino.reset_servos()
+        if self._blas_limits is not None:
+            self._blas_limits.restore_original_limits()
+            self._blas_limits = None
         log.info("Inference engine stopped.")
 
     def _on_emg_sample(self, vals: list):
-        """Called by arduino connection on each new EMG reading (40Hz)."""
-        padded = vals[:self.num_channels] + [0.0] * max(0, self.num_channels - len(vals))
-        self._emg_buffer.append(padded)
+        """
+        Called by arduino connection on each new EMG reading (40Hz). Inference
+        runs right here every step_size samples, so all engine state stays on
+        the receive thread and there is no polling loop.
+        """
+        row = self._ring[self._sample_count % len(self._ring)]
+        n = min(len(vals), self.num_channels)
+        row[:n] = vals[:n]
+        row[n:] = 0.0
         self._sample_count += 1
 
-    def _inference_loop(self):
-        """Runs inference every step_size new samples."""
-        last_processed = 0
-
-        while self.running:
-            # Wait until we have a full window
-            if len(self._emg_buffer) < self.window_size:
-                time.sleep(0.01)
-                continue
-
-            # Check if enough new samples arrived
-            new_samples = self._sample_count - last_processed
-            if new_samples < self.step_size:
-                time.sleep(0.005)
-                continue
-
-            last_processed = self._sample_count
-
-            # Get current window
-            window = np.array(list(self._emg_buffer)[-self.window_size:])
-
-            # Feature extraction
-            try:
+        if not self.running or self._sample_count < self.window_size:
+            return
+        if self._sample_count - self._last_processed >= self.step_size:
+            self._last_processed = self._sample_count
+            self._process_window()
+        elif self._pending and self._batch_age_ms() >= self.max_latency_ms:
+            self._flush_batch()
+
+    def _process_window(self):
+        """Extract features for the newest window and queue it for the MLP."""
+        window = self._copy_window(self._sample_count)
+
+        # Feature extraction
+        try:
+            if self._stats is not None:
+                self._advance_stats(self._sample_count)
+                feat = extract_features_running(self._stats, window)
+            else:
                 feat = extract_features(window)
-                feat_scaled = self.scaler.transform(feat.reshape(1, -1))
-            except Exception as e:
-                log.warning(f"Feature extraction error: {e}")
-                continue
-
-            # Classify
-            try:
-                probs = self.mlp.predict_proba(feat_scaled)[0]
-                pred_class = int(np.argmax(probs))
-                self.confidence = float(probs[pred_class])
-            except Exception as e:
-                log.warning(f"Inference error: {e}")
-                continue
-
-            # Smooth predictions
-            self._pred_history.append(pred_class)
-            smoothed = self._get_smoothed_gesture()
-
-            # Update if changed
-            if smoothed != self.current_gesture:
-                self.current_gesture = smoothed
-                self.current_gesture_name = self.gesture_map.get(smoothed, str(smoothed))
-                self._send_gesture(smoothed)
-
-                if self.on_gesture_change:
-                    self.on_gesture_change(smoothed, self.current_gesture_name, self.confidence)
-
-            self.inference_count += 1
-            self.last_inference_time = time.time()
-
-    def _get_smoothed_gesture(self) -> int:
-        """Majority vote over prediction history."""
-        if not self._pred_history:
-            return 0
-        from collections import Counter
-        counts = Counter(self._pred_history)
-        return counts.most_common(1)[0][0]
+            if (self.rest_threshold is not None
+                    and feat[0::FEATURES_PER_CH].sum() < self.rest_threshold):
+                # Sum of channel MAVs says REST: skip scaler and MLP
+                if self._pending:
+                    self._flush_batch()
+                self._apply_prediction(self._rest_probs)
+                return
+            row = self._feat_buf[self._pending]
+            np.subtract(feat, self._mean, out=row)
+            np.multiply(row, self._inv_scale, out=row)
+        except Exception as e:
+            log.warning(f"Feature extraction error: {e}")
+            return
+
+        if self._pending == 0:
+            self._pending_since = time.perf_counter()
+        self._pending += 1
+        if self._pending == self.batch_size or self._batch_age_ms() >= self.max_latency_ms:
+            self._flush_batch()
+
+    def _advance_stats(self, count: int):
+        """Bring the running feature sums up to sample count."""
+        size = len(self._ring)
+        if (count // size != self._stats_count // size
+                or count - self._stats_count > size - self.window_size):
+            # Once per ring lap (or if the ring has moved on) resum exactly,
+            # so float error can't build up
+            reset_running_stats(self._ring, count, self.window_size, self._stats)
+        else:
+            update_running_stats(self._ring, self._stats_count, count,
+                                 self.window_size, self._stats)
+        self._stats_count = count
+
+    def _batch_age_ms(self) -> float:
+        return (time.perf_counter() - self._pending_since) * 1000.0
+
+    def _flush_batch(self):
+        """Classify every queued window in one MLP call, then apply them in order."""
+        n, self._pending = self._pending, 0
+        try:
+            probs = self._predict_proba(self._feat_buf[:n])
+        except Exception as e:
+            log.warning(f"Inference error: {e}")
+            return
+        for p in probs:
+            self._apply_prediction(p)
+
+    def _apply_prediction(self, probs: np.ndarray):
+        pred_class = int(np.argmax(probs))
+        self.confidence = float(probs[pred_class])
+
+        # Smooth predictions
+        smoothed = self._vote(pred_class)
+
+        # Update if changed
+        if smoothed != self.current_gesture:
+            self.current_gesture = smoothed
+            self.current_gesture_name = self.gesture_map.get(smoothed, str(smoothed))
+            self._send_gesture(smoothed)
+
+            if self.on_gesture_change:
+                self.on_gesture_change(smoothed, self.current_gesture_name, self.confidence)
+
+        self.inference_count += 1
+        self.last_inference_time = time.time()
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """MLPClassifier.predict_proba for float32 X, into preallocated layer buffers."""
+        h = X
+        last = len(self._weights) - 1
+        for i, (W, b, out) in enumerate(zip(self._weights, self._biases, self._layers)):
+            out = out[:len(X)]
+            np.matmul(h, W, out=out)
+            out += b
+            _activate(self.mlp.activation if i < last else "identity", out)
+            h = out
+
+        if self.mlp.out_activation_ == "softmax":
+            h -= h.max(axis=1, keepdims=True)
+            np.exp(h, out=h)
+            h /= h.sum(axis=1, keepdims=True)
+            return h
+        # Binary model: a single logistic unit, expanded to [P(0), P(1)]
+        _activate("logistic", h)
+        return np.hstack([1 - h, h])
+
+    def _copy_window(self, end: int) -> np.ndarray:
+        """The window_size rows before sample end, oldest first, via two slice copies."""
+        size = len(self._ring)
+        start = (end - self.window_size) % size
+        first = min(self.window_size, size - start)
+        self._window[:first] = self._ring[start:start + first]
+        self._window[first:] = self._ring[:self.window_size - first]
+        return self._window
+
+    def _vote(self, pred_class: int) -> int:
+        """Push a prediction and return the majority vote over the history."""
+        pos = self._history_pos
+        if self._history_len == len(self._history):
+            self._vote_counts[self._history[pos]] -= 1
+        else:
+            self._history_len += 1
+        self._history[pos] = pred_class
+        self._vote_counts[pred_class] += 1
+        self._history_pos = (pos + 1) % len(self._history)
+        return int(self._vote_counts.argmax())
 
     def _send_gesture(self, gesture_id: int):
         """Send servo positions for this gesture to Arduino."""
@@ -181,9 +330,10 @@ class GestureInferenceEngine:
             "gesture": self.current_gesture,
             "gesture_name": self.current_gesture_name,
             "confidence": round(self.confidence, 3),
-            "buffer_size": len(self._emg_buffer),
+            "buffer_size": min(self._sample_count, len(self._ring)),
             "inference_count": self.inference_count,
-            "emg_latest": list(self._emg_buffer[-1]) if self._emg_buffer else [],
+            "emg_latest": (self._ring[(self._sample_count - 1) % len(self._ring)].tolist()
+                           if self._sample_count else []),
         }
 
 
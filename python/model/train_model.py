@@ -30,6 +30,12 @@ import logging
 from pathlib import Path
 from datetime import datetime
 
+# Same feature code as live inference, so train and predict can't drift apart
+from data_collection.collect_data import HAS_NUMBA, extract_features_batch
+
+# joblib ships with scikit-learn
+from joblib import Parallel, delayed
+
 # sklearn
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
@@ -53,6 +59,9 @@ WINDOW_SIZE     = 40    # samples per feature window (40 samples @ 40Hz = 1 seco
 WINDOW_STEP     = 10    # step between windows (75% overlap)
 NUM_CHANNELS    = 8
 FEATURES_PER_CH = 7     # MAV, RMS, VAR, WL, ZC, SSC, HFD
+SOM_MAX_SAMPLES = 2048  # windows the SOM is fitted on (it's for visualisation)
+SOM_ITERATIONS  = 2000
+REST_GATE_MARGIN = 0.9  # rest gate sits this far below the quietest non-REST window
 
 GESTURES = {
     0: "REST",        1: "FIST",         2: "PINCH",
@@ -78,61 +87,35 @@ GESTURE_SERVO_MAP = {
 
 # ─── FEATURE EXTRACTION ──────────────────────────────────────────────────────
 
-def higuchi_fd(x: np.ndarray, kmax: int = 5) -> float:
-    n = len(x)
-    L = []
-    for k in range(1, kmax + 1):
-        Lk = []
-        for m in range(1, k + 1):
-            idxs = np.arange(m - 1, n, k)
-            if len(idxs) < 2:
-                continue
-            subseq = x[idxs]
-            Lmk = np.sum(np.abs(np.diff(subseq))) * (n - 1) / (k * len(idxs))
-            Lk.append(Lmk)
-        if Lk:
-            L.append(np.mean(Lk))
-    if len(L) < 2:
-        return 0.0
-    ks = np.arange(1, len(L) + 1, dtype=float)
-    try:
-        coeffs = np.polyfit(np.log(ks), np.log(np.array(L) + 1e-10), 1)
-        return abs(coeffs[0])
-    except:
-        return 0.0
-
-
-def extract_features(window: np.ndarray) -> np.ndarray:
-    """Extract feature vector from one EMG window. window: (samples, channels)"""
-    features = []
-    for ch in range(window.shape[1]):
-        sig = window[:, ch].astype(float)
-        mav = np.mean(np.abs(sig))
-        rms = np.sqrt(np.mean(sig**2))
-        var = np.var(sig)
-        wl  = np.sum(np.abs(np.diff(sig)))
-        zc  = float(np.sum(np.diff(np.sign(sig)) != 0))
-        ssc = float(np.sum(np.diff(np.sign(np.diff(sig))) != 0))
-        hfd = higuchi_fd(sig, kmax=5)
-        features.extend([mav, rms, var, wl, zc, ssc, hfd])
-    return np.array(features, dtype=np.float32)
+def _extract_chunk(chunk: np.ndarray, label: int,
+                   window_size: int = WINDOW_SIZE, window_step: int = WINDOW_STEP) -> tuple:
+    """Features and labels for every window of one gesture's samples (samples, channels)."""
+    n = len(chunk) - window_size
+    if n <= 0:
+        return None
+    # Every window of the chunk as a zero-copy view, shape (n, channels, samples)
+    wins = np.lib.stride_tricks.sliding_window_view(chunk, window_size, axis=0)[:n:window_step]
+    return extract_features_batch(wins.transpose(0, 2, 1)), np.full(len(wins), int(label))
 
 
 def make_windows(df: pd.DataFrame) -> tuple:
     """Slide window over time-series data and extract features."""
     channel_cols = [f"ch{i}" for i in range(NUM_CHANNELS)]
-    X, y = [], []
 
-    # Group by label so we don't create windows that cross gesture boundaries
-    for label in df["label"].unique():
-        chunk = df[df["label"] == label][channel_cols].values
-        for start in range(0, len(chunk) - WINDOW_SIZE, WINDOW_STEP):
-            window = chunk[start:start + WINDOW_SIZE]
-            feat = extract_features(window)
-            X.append(feat)
-            y.append(int(label))
+    # Group by label so we don't create windows that cross gesture boundaries.
+    # The compiled batch kernel already spreads windows over all cores; only
+    # the pure-numpy fallback is worth fanning out across processes.
+    groups = df.groupby("label", sort=False)
+    results = Parallel(n_jobs=1 if HAS_NUMBA else -1)(
+        delayed(_extract_chunk)(g[channel_cols].to_numpy(dtype=np.float32), label)
+        for label, g in groups
+    )
+    results = [r for r in results if r is not None]
 
-    return np.array(X), np.array(y)
+    if not results:
+        return np.empty((0, NUM_CHANNELS * FEATURES_PER_CH), dtype=np.float32), np.empty(0, dtype=int)
+    X, y = zip(*results)
+    return np.concatenate(X), np.concatenate(y)
 
 
 # ─── SOM ─────────────────────────────────────────────────────────────────────
@@ -158,12 +141,15 @@ def train_som(X_scaled: np.ndarray, labels: np.ndarray, som_size: int = 10):
         random_seed=42
     )
 
-    som.random_weights_init(X_scaled)
-    som.train_batch(X_scaled, num_iteration=5000, verbose=False)
+    # A fixed random subset is plenty to lay out the map; fit on it only
+    rng = np.random.default_rng(42)
+    subset = X_scaled[rng.choice(len(X_scaled), min(SOM_MAX_SAMPLES, len(X_scaled)), replace=False)]
+    som.random_weights_init(subset)
+    som.train_batch(subset, num_iteration=SOM_ITERATIONS, verbose=False)
 
     log.info("SOM training complete.")
 
-    # Compute quantization error (lower = better fit)
+    # Compute quantization error on all windows (lower = better fit)
     qe = som.quantization_error(X_scaled)
     log.info(f"SOM quantization error: {qe:.4f}")
 
@@ -209,9 +195,28 @@ def train_mlp(X_train, X_test, y_train, y_test):
     return mlp, acc
 
 
+# ─── REST GATE ───────────────────────────────────────────────────────────────
+
+def calibrate_rest_threshold(X: np.ndarray, y: np.ndarray):
+    """
+    Energy (sum of channel MAVs, unscaled features) below which a window is
+    taken as REST without running the MLP. Placed under every non-REST
+    training window, so the gate never swallows a real gesture it has seen.
+    Returns None (gate disabled) if there is no REST or no gesture data.
+    """
+    energy = X[:, 0::FEATURES_PER_CH].sum(axis=1)
+    active = energy[y != 0]
+    if active.size == 0 or not np.any(y == 0):
+        return None
+    threshold = float(active.min()) * REST_GATE_MARGIN
+    log.info(f"REST gate: energy < {threshold:.2f} "
+             f"({np.mean(energy[y == 0] < threshold)*100:.0f}% of REST windows)")
+    return threshold
+
+
 # ─── SAVE / LOAD MODEL ───────────────────────────────────────────────────────
 
-def save_model(mlp, scaler, som, output_dir: str):
+def save_model(mlp, scaler, som, output_dir: str, rest_threshold=None):
     out = Path(output_dir)
     out.mkdir(parents=True, exist_ok=True)
 
@@ -224,6 +229,7 @@ def save_model(mlp, scaler, som, output_dir: str):
         "num_channels": NUM_CHANNELS,
         "window_size": WINDOW_SIZE,
         "features_per_ch": FEATURES_PER_CH,
+        "rest_threshold": rest_threshold,
         "trained_at": datetime.now().isoformat(),
     }
 
@@ -255,9 +261,14 @@ def main(data_path: str, output_dir: str = "models"):
     X, y = make_windows(df)
     log.info(f"Feature matrix: {X.shape} | Labels: {len(y)}")
 
-    # Normalize
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    rest_threshold = calibrate_rest_threshold(X, y)
+
+    # Normalize. X is float32 from make_windows; keep the fitted stats in
+    # float32 as well so the whole training path (and the bundle) stays 32-bit
+    scaler = StandardScaler().fit(X)
+    for attr in ("mean_", "var_", "scale_"):
+        setattr(scaler, attr, getattr(scaler, attr).astype(np.float32))
+    X_scaled = scaler.transform(X)
 
     # Train/test split
     X_train, X_test, y_train, y_test = train_test_split(
@@ -272,7 +283,7 @@ def main(data_path: str, output_dir: str = "models"):
     mlp, acc = train_mlp(X_train, X_test, y_train, y_test)
 
     # Save
-    model_path = save_model(mlp, scaler, som, output_dir)
+    model_path = save_model(mlp, scaler, som, output_dir, rest_threshold)
 
     print(f"\n{'='*60}")
     print(f"  Training complete!")
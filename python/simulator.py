@@ -22,12 +22,13 @@ How it works:
 """
 
 import socket
+import struct
 import threading
 import time
-import math
-import random
 import sys
 
+import numpy as np
+
 # ─── SIMULATED GESTURE EMG PROFILES ────────────────────────────────────────
 # Each gesture has a characteristic EMG pattern across 8 channels
 # Values are base amplitudes (0-512 range, mimicking Arduino analog read)
@@ -48,6 +49,24 @@ HOST = "127.0.0.1"
 PORT = 5001
 SAMPLE_RATE_HZ = 40  # matches real system
 
+# Binary EMG frame, same layout as the firmware (see comms/arduino_link.py):
+# tag byte 0xA5 + 8x uint16 little-endian RMS in hundredths + CRC-8 of the values
+EMG_FRAME_TAG = 0xA5
+EMG_FRAME = struct.Struct("<B8HB")
+# Binary SERVO frame from the host (offered via STATUS:PROTO:2): tag 0xA6 + 15x uint8
+SERVO_FRAME_TAG = 0xA6
+SERVO_FRAME = struct.Struct("<B15B")
+
+
+def _crc8(data: bytes) -> int:
+    """CRC-8, polynomial 0x07, init 0 (as the firmware)."""
+    crc = 0
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
 
 class ArduinoSimulator:
     def __init__(self):
@@ -64,6 +83,14 @@ class ArduinoSimulator:
         self.gesture_list = list(GESTURE_EMG_PROFILES.keys())
         self.gesture_idx = 0
 
+        # Per-gesture profiles and per-channel phases as arrays, built once
+        self._rng = np.random.default_rng()
+        self._profiles = {g: np.asarray(p, dtype=np.float64)
+                          for g, p in GESTURE_EMG_PROFILES.items()}
+        self._noise_sd = {g: np.maximum(5, p * 0.15) for g, p in self._profiles.items()}
+        self._phase_tremor = np.arange(8) * 0.7
+        self._phase_hf = np.arange(8) * 1.3
+
     def start(self):
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -105,7 +132,7 @@ class ArduinoSimulator:
 
     def _handle_client(self, conn: socket.socket):
         """Handle one connected client."""
-        conn.sendall(b"STATUS:READY\n")
+        conn.sendall(b"STATUS:READY\nSTATUS:PROTO:2\n")
 
         rx_thread = threading.Thread(
             target=self._receive_loop, args=(conn,), daemon=True
@@ -116,9 +143,7 @@ class ArduinoSimulator:
         interval = 1.0 / SAMPLE_RATE_HZ
         while self.running and self.client:
             try:
-                emg_vals = self._generate_emg()
-                msg = "EMG:" + ",".join(f"{v:.2f}" for v in emg_vals) + "\n"
-                conn.sendall(msg.encode())
+                conn.sendall(self._encode_emg(self._generate_emg()))
                 self.t += interval
             except (BrokenPipeError, ConnectionResetError, OSError):
                 break
@@ -126,29 +151,33 @@ class ArduinoSimulator:
 
     def _receive_loop(self, conn: socket.socket):
         """Parse incoming commands from Python client."""
-        buf = ""
+        buf = bytearray()
         while self.running and self.client:
             try:
-                data = conn.recv(256).decode("utf-8", errors="ignore")
+                data = conn.recv(256)
                 if not data:
                     break
                 buf += data
-                while "\n" in buf:
-                    line, buf = buf.split("\n", 1)
-                    self._parse_command(line.strip())
+                off = 0
+                while off < len(buf):
+                    if buf[off] == SERVO_FRAME_TAG:
+                        if len(buf) - off < SERVO_FRAME.size:
+                            break
+                        self._set_servos(list(SERVO_FRAME.unpack_from(buf, off)[1:]))
+                        off += SERVO_FRAME.size
+                    else:
+                        nl = buf.find(b"\n", off)
+                        if nl < 0:
+                            break
+                        self._parse_command(buf[off:nl].decode("utf-8", errors="ignore").strip())
+                        off = nl + 1
+                del buf[:off]
             except (socket.timeout, OSError):
                 break
 
     def _parse_command(self, cmd: str):
         if cmd.startswith("SERVO:"):
-            angles = [int(x) for x in cmd[6:].split(",") if x]
-            self.servo_angles = angles
-            finger_names = ["Thumb", "Index", "Middle", "Ring", "Pinky", "Wrist"]
-            display = " | ".join(
-                f"{finger_names[i//3] if i < 15 else 'W'}:{angles[i]}°"
-                for i in range(0, min(len(angles), 15), 3)
-            )
-            print(f"[SIM] Servos → {display}")
+            self._set_servos([int(x) for x in cmd[6:].split(",") if x])
 
         elif cmd.startswith("MODE:"):
             self.mode = int(cmd[5:])
@@ -175,24 +204,37 @@ class ArduinoSimulator:
                     self.current_gesture = g
                 print(f"[SIM] Gesture forced to: {g}")
 
-    def _generate_emg(self) -> list:
+    def _set_servos(self, angles: list):
+        self.servo_angles = angles
+        finger_names = ["Thumb", "Index", "Middle", "Ring", "Pinky", "Wrist"]
+        display = " | ".join(
+            f"{finger_names[i//3] if i < 15 else 'W'}:{angles[i]}°"
+            for i in range(0, min(len(angles), 15), 3)
+        )
+        print(f"[SIM] Servos → {display}")
+
+    def _generate_emg(self) -> np.ndarray:
         """Generate realistic noisy EMG signal for current gesture."""
         with self.gesture_lock:
-            profile = GESTURE_EMG_PROFILES[self.current_gesture]
-
-        emg = []
-        for i, base in enumerate(profile):
-            # Gaussian noise proportional to signal strength
-            noise = random.gauss(0, max(5, base * 0.15))
-            # Low-frequency muscle tremor (3-12 Hz)
-            tremor = base * 0.1 * math.sin(2 * math.pi * 7 * self.t + i * 0.7)
-            # High-frequency EMG oscillation (50-150 Hz typical)
-            hf = base * 0.2 * math.sin(2 * math.pi * 80 * self.t + i * 1.3)
-            val = max(0, base + noise + tremor + hf)
-            emg.append(round(val, 2))
+            gesture = self.current_gesture
+        profile = self._profiles[gesture]
+
+        # Gaussian noise proportional to signal strength
+        emg = self._rng.normal(profile, self._noise_sd[gesture])
+        # Low-frequency muscle tremor (3-12 Hz)
+        emg += profile * 0.1 * np.sin(2 * np.pi * 7 * self.t + self._phase_tremor)
+        # High-frequency EMG oscillation (50-150 Hz typical)
+        emg += profile * 0.2 * np.sin(2 * np.pi * 80 * self.t + self._phase_hf)
+        np.maximum(emg, 0, out=emg)
 
         return emg
 
+    @staticmethod
+    def _encode_emg(emg: np.ndarray) -> bytes:
+        """Pack one sample as a binary EMG frame (values to 0.01 resolution)."""
+        hundredths = np.minimum(np.rint(emg * 100), 0xFFFF).astype("<u2")
+        return EMG_FRAME.pack(EMG_FRAME_TAG, *hundredths.tolist(), _crc8(hundredths.tobytes()))
+
     def _cycle_gestures(self):
         """Automatically cycle through gestures every 4 seconds in demo mode."""
         time.sleep(2)  # wait for connection
@@ -1,24 +1,25 @@
 import tkinter as tk
 import random
+from collections import deque
 
 root = tk.Tk()
 root.geometry("600x200")
 canvas = tk.Canvas(root, bg="black", width=600, height=200)
 canvas.pack()
 
-data = [100.0] * 100
+W, H = 600, 200
+data = deque([100.0] * 100, maxlen=100)
+step = W / len(data)
+xs = [j * step for j in range(len(data))]
+
+# One persistent line; each frame only rewrites its coordinates
+line_id = canvas.create_line([c for xy in zip(xs, (H - v for v in data)) for c in xy],
+                             fill="lime", width=2)
 
 def update():
+    root.after(50, update)   # schedule first so drawing time doesn't add drift
     data.append(random.uniform(0, 200))
-    data.pop(0)
-    canvas.delete("all")
-    w, h = 600, 200
-    step = w / len(data)
-    points = []
-    for j, v in enumerate(data):
-        points.extend([j * step, h - v])
-    canvas.create_line(points, fill="lime", width=2)
-    root.after(50, update)
+    canvas.coords(line_id, *[c for xy in zip(xs, (H - v for v in data)) for c in xy])
 
 update()
 root.mainloop()
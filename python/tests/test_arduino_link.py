@@ -0,0 +1,54 @@
+"""RX framing tests for comms/arduino_link.py (no hardware or socket needed)."""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+import comms.arduino_link as al
+from simulator import ArduinoSimulator
+
+
+def _frame(vals) -> bytes:
+    return ArduinoSimulator._encode_emg(np.asarray(vals, dtype=np.float64))
+
+
+def _feed(data: bytes, chunk: int):
+    """Push data through _consume in reads of chunk bytes; returns (emg rows, status msgs)."""
+    conn = al.ArduinoConnection()
+    emg, status = [], []
+    conn.on_emg_data = emg.append
+    conn.on_status = status.append
+    for i in range(0, len(data), chunk):
+        piece = data[i:i + chunk]
+        conn._rx_buf[conn._rx_tail:conn._rx_tail + len(piece)] = piece
+        conn._rx_tail += len(piece)
+        conn._rx_head = conn._consume(conn._rx_head, conn._rx_tail)
+        conn._compact_rx()
+    return emg, status
+
+
+@pytest.mark.parametrize("numba", [True, False])
+@pytest.mark.parametrize("chunk", [4096, 7, 1])
+def test_status_lines_after_garbage_are_delivered(monkeypatch, numba, chunk):
+    if not numba:
+        monkeypatch.setattr(al, "HAS_NUMBA", False)
+    vals = [1.5, 2.25, 0, 10, 100, 0.01, 300, 42]
+    data = b"Booting v1.2\nSTATUS:READY\nSTATUS:PONG\n" + _frame(vals)
+
+    emg, status = _feed(data, chunk)
+
+    assert status == ["READY", "PONG"]
+    assert len(emg) == 1
+    assert np.allclose(emg[0], vals, atol=1e-3)
+
+
+def test_resyncs_when_joined_mid_frame():
+    rows = [[i + 0.5 * ch for ch in range(8)] for i in range(20)]
+    data = b"".join(_frame(r) for r in rows)
+
+    for offset in range(1, al.EMG_FRAME_SIZE):
+        emg, _ = _feed(data[offset:], 4096)
+        assert np.allclose(emg, rows[1:], atol=1e-3), offset